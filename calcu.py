@@ -1,152 +1,126 @@
+import functools
+import math
+
 import streamlit as st
-import pandas as pd
 import numpy as np
 
+from calcu_core import PASO, TOTAL_UNIDADES, calcular_acumulados, generar_precios, lotes_por_diferencia
+
 # -------------------------------------------------------------------------
 # CONSTANTES GLOBALES
 # -------------------------------------------------------------------------
-LOTES_A_UNIDADES = 100  # 1 lote = 100 unidades
-PASO = 15  # Paso de precio ajustado a 15 unidades
-TOTAL_UNIDADES = 120  # Total de unidades a cubrir
 DIVISOR_LOTE = 1.5932  # Divisor para ajustar los lotajes
 DIVISOR_CONSERVADOR = 2.11 # Divisor adicional para la opción conservadora
 DIVISOR_MUY_AGRESIVA = 1.6 # Divisor para la opción muy agresiva
 DIVISOR_SEMI_AGRESIVA = 2.25 # Divisor para la opción semi agresiva
 
+# Lotajes fijos de las primeras nueve compras para cada opción.
+# Solo varían la sexta y la octava compra.
+LOTES_FIJOS = {
+    1: np.array([1.0, 1.4, 2.4, 2, 2.4 * 1.3, 0, 3 * 1.5, 0, 4 * 1.5]),  # Neutra
+    2: np.array([1.0, 1.4, 2.4, 2, 2.4 * 1.3, 2.4 * 1.3, 3 * 1.5, 3, 4 * 1.5]),  # Agresiva
+    3: np.array([1.0, 1.4, 2.4, 2, 2.4 * 1.3, 2.4 * 1.3, 3 * 1.5, 3, 4 * 1.5]),  # Conservadora
+    4: np.array([1.0, 1.4, 2.4, 2, 2.4 * 1.3, 2.4 * 1.3, 3 * 1.5, 3, 4 * 1.5]),  # Muy Agresiva
+    5: np.array([1.0, 1.4, 2.4, 2, 2.4 * 1.3, 2.4 * 1.3, 3 * 1.5, 3, 4 * 1.5]),  # Semi Agresiva
+    6: np.array([1.0, 1.4, 2.4, 2, 2.4 * 1.3, 2.4 * 1.3, 3 * 1.5, 3, 4 * 1.5]),  # Súper Agresiva
+    7: np.array([1.0, 1.4, 2.4, 2, 2.4 * 1.3, 2, 3 * 1.5, 0, 4 * 1.5]),  # Semi Conservadora
+}
+
+# Factores por los que se multiplican los lotajes de cada opción y divisor que se aplica después.
+# Se aplican en ese orden, sin combinarlos, para obtener exactamente los mismos lotajes.
+ESCALA_LOTES = {
+    1: ((), DIVISOR_LOTE),  # Neutra
+    2: ((), DIVISOR_LOTE),  # Agresiva
+    3: ((), DIVISOR_CONSERVADOR),  # Conservadora
+    4: ((1.25,), DIVISOR_MUY_AGRESIVA),  # Muy Agresiva
+    5: ((1.25,), DIVISOR_SEMI_AGRESIVA),  # Semi Agresiva
+    6: ((1.25, 1.2), DIVISOR_MUY_AGRESIVA),  # Súper Agresiva
+    7: ((), DIVISOR_LOTE),  # Semi Conservadora
+}
+
 # -------------------------------------------------------------------------
 # FUNCIONES AUXILIARES
 # -------------------------------------------------------------------------
 
-def generar_precios(precio_inicial, total_unidades, paso=15, direccion="bajada"):
+def _asignar_vectorizado(precio_inicial, precios, fijos, factores, divisor):
     """
-    Genera una lista de precios decrecientes o crecientes desde precio_inicial dependiendo de la dirección.
+    Núcleo de asignar_lotes para una opción ya resuelta en sus lotajes fijos y su escala.
     """
-    numero_puntos = total_unidades // paso + 1  # +1 para incluir el precio final
-    if direccion == "bajada":
-        precios = [precio_inicial - i * paso for i in range(numero_puntos)]
-    elif direccion == "subida":
-        precios = [precio_inicial + i * paso for i in range(numero_puntos)]
-    else:
-        raise ValueError("La dirección debe ser 'bajada' o 'subida'.")
-    return precios
+    precios = np.asarray(precios, dtype=np.float64)
+    lotes = lotes_por_diferencia(np.abs(precios - precio_inicial))
+
+    # Las primeras nueve compras tienen lotajes fijos
+    n = min(fijos.size, lotes.size)
+    lotes[:n] = fijos[:n]
+
+    # Escalar los lotajes según la opción seleccionada
+    for factor in factores:
+        lotes *= factor
+    lotes /= divisor
+    return lotes
+
+# Una versión especializada de _asignar_vectorizado por opción
+_ASIGNADORES = {
+    opcion: functools.partial(
+        _asignar_vectorizado, fijos=LOTES_FIJOS[opcion], factores=factores, divisor=divisor
+    )
+    for opcion, (factores, divisor) in ESCALA_LOTES.items()
+}
 
 def asignar_lotes(precio_inicial, precios, opcion):
     """
     Asigna lotes basados en la diferencia de precio desde el precio inicial.
     """
-    lotes = []
-    for i, precio in enumerate(precios):
-        if i == 0:  # Para el precio inicial
-            lotes.append(1.0)
-        elif i == 1:  # Para la segunda compra
-            lotes.append(1.4)
-        elif i == 2:  # Para la tercera compra
-            lotes.append(2.4)
-        elif i == 3:  # Para la cuarta compra
-            lotes.append(2)
-        elif i == 4:  # Para la quinta compra
-            lotes.append(2.4 * 1.3)
-        elif i == 5:  # Para la sexta compra
-            if opcion == 1:
-                lotes.append(0)
-            elif opcion in [2, 3, 4, 5, 6]:
-                lotes.append(2.4 * 1.3)
-            elif opcion == 7:  # Semi Conservadora
-                lotes.append(2)  # Mismo lotaje que la compra 4 indexada por 3
-        elif i == 6:
-            lotes.append(3 * 1.5)
-        elif i == 7:  # Para la octava compra
-            if opcion == 1 or opcion == 7:  # Neutra o Semi Conservadora
-                lotes.append(0)
-            elif opcion == 2:
-                lotes.append(3)
-            elif opcion in [3, 4, 5, 6]:
-                lotes.append(3)
-        elif i == 8:
-            lotes.append(4 * 1.5)
-        else:
-            diferencia = abs(precio_inicial - precio)
-            if 0 <= diferencia <= 15:
-                lotes.append(0.5)
-            elif diferencia == 20:
-                lotes.append(0.0)
-            elif diferencia in [25, 30]:
-                lotes.append(2.0)
-            elif 35 <= diferencia <= 55:
-                if diferencia == 55:
-                    lotes.append(0.0)
-                else:
-                    lotes.append(0.625)
-            elif diferencia == 60:
-                lotes.append(6.0)
-            elif 65 <= diferencia <= 90:
-                lotes.append(2.0)
-            elif 91 <= diferencia <= 94:
-                lotes.append(1.5)
-            elif 95 <= diferencia <= 120:
-                lotes.append(3.375)
-            else:
-                lotes.append(0.5)
-
-    # Dividir los lotajes según la opción seleccionada
-    if opcion == 3:
-        lotes_ajustados = [lote / DIVISOR_CONSERVADOR for lote in lotes]
-    elif opcion == 4:  # Muy Agresiva
-        lotes_ajustados = [(lote * 1.25) / DIVISOR_MUY_AGRESIVA for lote in lotes]
-    elif opcion == 5:  # Semi Agresiva
-        lotes_ajustados = [(lote * 1.25) / DIVISOR_SEMI_AGRESIVA for lote in lotes]
-    elif opcion == 6:  # Súper Agresiva
-        lotes_ajustados = [(lote * 1.25 * 1.2) / DIVISOR_MUY_AGRESIVA for lote in lotes]
-    else:
-        lotes_ajustados = [lote / DIVISOR_LOTE for lote in lotes]
-
-    return lotes_ajustados
-
-def crear_dataframe(precios, lotes):
-    """
-    Crea un DataFrame con los precios y los lotes asignados.
-    """
-    df = pd.DataFrame({
-        'Precio': precios,
-        'Lotes': lotes
-    })
-    return df
+    return _ASIGNADORES[opcion](precio_inicial, precios)
 
-def calcular_acumulados(df, precio_inicial, direccion):
-    """
-    Calcula los lotes acumulados, break-even, flotante, puntos de salida.
-    También calcula el aumento necesario desde el precio actual para ganar $5000.
-    """
-    df['Lotes Acumulados'] = df['Lotes'].cumsum()
-    df['Break Even'] = (df['Precio'] * df['Lotes'] * LOTES_A_UNIDADES).cumsum() / (df['Lotes Acumulados'] * LOTES_A_UNIDADES)
-    df['Flotante'] = (df['Precio'] - df['Break Even']) * df['Lotes Acumulados'] * LOTES_A_UNIDADES
-    # Calcular puntos de salida con signo dependiendo de la dirección
-    if direccion == "subida":
-        df['Puntos de salida'] = df['Break Even'] - df['Precio']
-    else:
-        df['Puntos de salida'] = abs(df['Precio'] - df['Break Even'])
-    # Calcular el aumento necesario desde el precio actual para ganar $5000
-    df['Aumento Necesario para $5000'] = (df['Break Even'] + (5000 / (df['Lotes Acumulados'] * LOTES_A_UNIDADES))) - df['Precio']
-    # Calcular ganancia si el precio regresa al inicial
-    if direccion == "subida":
-        df['Ganancia al Regresar al Precio Inicial'] = (df['Precio'] - precio_inicial) * df['Lotes Acumulados'] * LOTES_A_UNIDADES * -1
-    else:
-        df['Ganancia al Regresar al Precio Inicial'] = (precio_inicial - df['Precio']) * df['Lotes Acumulados'] * LOTES_A_UNIDADES
-    # Reemplazar inf, -inf y NaN en caso de divisiones por cero o acumulación cero
-    df['Aumento Necesario para $5000'] = df['Aumento Necesario para $5000'].replace([np.inf, -np.inf, np.nan], 0)
-    df['Ganancia al Regresar al Precio Inicial'] = df['Ganancia al Regresar al Precio Inicial'].replace([np.inf, -np.inf, np.nan], 0)
-    return df
-
-def validar_precio_final(df, precio_esperado):
+def validar_precio_final(precios, precio_esperado):
     """
-    Verifica que el último precio en el DataFrame sea igual al precio esperado.
+    Verifica que el último precio generado sea igual al precio esperado.
     """
-    ultimo_precio_calculado = df['Precio'].iloc[-1]
-    if ultimo_precio_calculado != precio_esperado:
+    ultimo_precio_calculado = float(precios[-1])
+    if not math.isclose(ultimo_precio_calculado, precio_esperado, abs_tol=1e-9):
         st.error(f"Error: El último precio calculado es {ultimo_precio_calculado}, pero se esperaba {precio_esperado}.")
         return False
     return True
 
+@st.cache_data
+def calcular_distribucion(precio_inicial, direccion, opcion):
+    """
+    Genera precios y lotes, calcula los acumulados y redondea la tabla para mostrarla.
+    Devuelve None si el último precio no es el esperado, sin calcular lo demás.
+    El resultado se guarda en caché por (precio_inicial, direccion, opcion).
+    """
+    # pyarrow solo se necesita para armar la tabla, así que se importa aquí
+    import pyarrow as pa
+
+    precios = generar_precios(precio_inicial, TOTAL_UNIDADES, PASO, direccion)
+
+    # Validar el precio final antes de calcular la distribución
+    precio_esperado = precio_inicial + TOTAL_UNIDADES if direccion == "subida" else precio_inicial - TOTAL_UNIDADES
+    if not validar_precio_final(precios, precio_esperado):
+        return None
+
+    lotes = asignar_lotes(precio_inicial, precios, opcion)
+    lotes_acumulados, break_even, flotante, puntos_salida, aumento, ganancia = calcular_acumulados(
+        precios, lotes, precio_inicial, direccion
+    )
+
+    # Columna, valores y decimales con los que se redondea para mejor visualización
+    columnas = {
+        'Precio': (precios, 2),
+        'Lotes': (lotes, 4),
+        'Lotes Acumulados': (lotes_acumulados, 4),
+        'Break Even': (break_even, 2),
+        'Flotante': (flotante, 2),
+        'Puntos de salida': (puntos_salida, 2),
+        'Aumento Necesario para $5000': (aumento, 2),
+        'Ganancia al Regresar al Precio Inicial': (ganancia, 2),
+    }
+    return pa.table({
+        nombre: pa.array(np.round(valores, decimales))
+        for nombre, (valores, decimales) in columnas.items()
+    })
+
 # -------------------------------------------------------------------------
 # APLICACIÓN PRINCIPAL DE STREAMLIT
 # -------------------------------------------------------------------------
@@ -172,42 +146,14 @@ def main():
 
     # Botón para ejecutar el cálculo
     if st.button("Calcular Distribución en Tramos"):
-        # Generar lista de precios
-        precios = generar_precios(precio_inicial, TOTAL_UNIDADES, PASO, direccion)
-
-        # Asignar lotes según las reglas y ajustar
-        lotes = asignar_lotes(precio_inicial, precios, opcion_numerica)
-
-        # Verificar que las listas tengan la misma longitud
-        if len(precios) != len(lotes):
-            st.error("Error: Las listas de precios y lotes no tienen la misma longitud.")
-        else:
-            # Crear DataFrame
-            df = crear_dataframe(precios, lotes)
-
-            # Calcular acumulados
-            df = calcular_acumulados(df, precio_inicial, direccion)
-
-            # Redondear valores para mejor visualización
-            df['Precio'] = df['Precio'].round(2)
-            df['Lotes'] = df['Lotes'].round(4)
-            df['Lotes Acumulados'] = df['Lotes Acumulados'].round(4)
-            df['Break Even'] = df['Break Even'].round(2)
-            df['Flotante'] = df['Flotante'].round(2)
-            df['Puntos de salida'] = df['Puntos de salida'].round(2)
-            df['Aumento Necesario para $5000'] = df['Aumento Necesario para $5000'].round(2)
-            df['Ganancia al Regresar al Precio Inicial'] = df['Ganancia al Regresar al Precio Inicial'].round(2)
-
-            # Calcular precio esperado
-            precio_esperado = precio_inicial + TOTAL_UNIDADES if direccion == "subida" else precio_inicial - TOTAL_UNIDADES
-
-            # Validar el precio final
-            es_valido = validar_precio_final(df, precio_esperado)
-
-            if es_valido:
-                # Mostrar resultados
-                st.write("### Detalles de las Transacciones:")
-                st.dataframe(df)
+        # Calcular la distribución (se reutiliza si las entradas no cambian)
+        tabla = calcular_distribucion(precio_inicial, direccion, opcion_numerica)
+
+        # Solo se muestra si el precio final fue válido
+        if tabla is not None:
+            # Mostrar resultados
+            st.write("### Detalles de las Transacciones:")
+            st.dataframe(tabla)
 
 # Ejecutar la aplicación
 if __name__ == "__main__":
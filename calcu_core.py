@@ -0,0 +1,136 @@
+import numpy as np
+
+# -------------------------------------------------------------------------
+# CONSTANTES GLOBALES
+# -------------------------------------------------------------------------
+LOTES_A_UNIDADES = 100  # 1 lote = 100 unidades
+PASO = 15  # Paso de precio ajustado a 15 unidades
+TOTAL_UNIDADES = 120  # Total de unidades a cubrir
+USAR_NUMBA = False  # Mapear diferencias con Numba en lugar de _TABLA_LOTES (requiere numba; se puede cambiar en ejecución)
+
+# Lotaje según la diferencia entera de precio respecto al precio inicial (0..120).
+# La última posición cubre cualquier diferencia fuera de rango.
+_TABLA_LOTES = np.full(122, 0.5)
+_TABLA_LOTES[20] = 0.0
+_TABLA_LOTES[[25, 30]] = 2.0
+_TABLA_LOTES[35:55] = 0.625
+_TABLA_LOTES[55] = 0.0
+_TABLA_LOTES[60] = 6.0
+_TABLA_LOTES[65:91] = 2.0
+_TABLA_LOTES[91:95] = 1.5
+_TABLA_LOTES[95:121] = 3.375
+_TABLA_LOTES.flags.writeable = False  # Constante compartida: nadie debe modificarla
+
+# -------------------------------------------------------------------------
+# FUNCIONES NUMÉRICAS COMPARTIDAS
+# -------------------------------------------------------------------------
+
+def _mapear_lotes(diferencias, salida):
+    """
+    Escribe en salida el lotaje de cada diferencia entera de precio (equivalente a _TABLA_LOTES).
+    """
+    for i in range(diferencias.size):
+        d = diferencias[i]
+        if d <= 15:
+            salida[i] = 0.5
+        elif d == 20 or d == 55:
+            salida[i] = 0.0
+        elif d == 25 or d == 30:
+            salida[i] = 2.0
+        elif 35 <= d < 55:
+            salida[i] = 0.625
+        elif d == 60:
+            salida[i] = 6.0
+        elif 65 <= d <= 90:
+            salida[i] = 2.0
+        elif 91 <= d <= 94:
+            salida[i] = 1.5
+        elif 95 <= d <= 120:
+            salida[i] = 3.375
+        else:
+            salida[i] = 0.5
+
+_kernel_numba = None  # _mapear_lotes compilado con Numba; se crea la primera vez que se usa
+
+def _compilar_kernel():
+    """
+    Compila _mapear_lotes con Numba una sola vez y verifica que coincida con _TABLA_LOTES.
+    """
+    global _kernel_numba
+    if _kernel_numba is None:
+        from numba import njit
+
+        # cache=True reutiliza el código compilado en otros procesos
+        kernel = njit(cache=True)(_mapear_lotes)
+        # Compilar comparando contra la tabla, incluidas diferencias fuera de rango
+        diferencias = np.arange(_TABLA_LOTES.size + 10, dtype=np.int64)
+        salida = np.empty(diferencias.size)
+        kernel(diferencias, salida)
+        if not np.array_equal(salida, _TABLA_LOTES[np.minimum(diferencias, _TABLA_LOTES.size - 1)]):
+            raise RuntimeError("El kernel de Numba no coincide con _TABLA_LOTES.")
+        _kernel_numba = kernel
+    return _kernel_numba
+
+def lotes_por_diferencia(diferencias):
+    """
+    Devuelve un arreglo nuevo con el lotaje base de cada diferencia absoluta de precio.
+    """
+    diferencias = np.rint(diferencias).astype(np.int64)
+    if USAR_NUMBA:
+        lotes = np.empty(diferencias.size)
+        _compilar_kernel()(diferencias, lotes)
+        return lotes
+    return _TABLA_LOTES[np.minimum(diferencias, _TABLA_LOTES.size - 1)]
+
+def generar_precios(precio_inicial, total_unidades, paso=15, direccion="bajada"):
+    """
+    Genera un arreglo de precios decrecientes o crecientes desde precio_inicial dependiendo de la dirección.
+    """
+    numero_puntos = total_unidades // paso + 1  # +1 para incluir el precio final
+    if direccion == "bajada":
+        signo = -1.0
+    elif direccion == "subida":
+        signo = 1.0
+    else:
+        raise ValueError("La dirección debe ser 'bajada' o 'subida'.")
+    return precio_inicial + signo * paso * np.arange(numero_puntos, dtype=np.float64)
+
+def calcular_acumulados(precios, lotes, precio_inicial, direccion):
+    """
+    Calcula los lotes acumulados, break-even, flotante, puntos de salida.
+    También calcula el aumento necesario desde el precio actual para ganar $5000.
+    Devuelve un arreglo por columna, en el orden en que se muestran.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lotes_acumulados = np.empty_like(lotes)
+        np.cumsum(lotes, out=lotes_acumulados)
+        unidades_acumuladas = lotes_acumulados * LOTES_A_UNIDADES
+        # El producto, su suma acumulada y la división comparten un solo arreglo
+        break_even = np.multiply(precios, lotes)
+        break_even *= LOTES_A_UNIDADES
+        np.cumsum(break_even, out=break_even)
+        break_even /= unidades_acumuladas
+        # Diferencia con signo entre el precio y el break-even, para flotante y puntos de salida
+        desvio = precios - break_even
+        flotante = desvio * lotes_acumulados
+        flotante *= LOTES_A_UNIDADES
+        # Calcular puntos de salida con signo dependiendo de la dirección
+        if direccion == "subida":
+            puntos_salida = -desvio
+        else:
+            puntos_salida = np.abs(desvio)
+        # Calcular el aumento necesario desde el precio actual para ganar $5000
+        aumento = 5000 / unidades_acumuladas
+        aumento += break_even
+        aumento -= precios
+        # Calcular ganancia si el precio regresa al inicial
+        if direccion == "subida":
+            ganancia = (precios - precio_inicial) * lotes_acumulados * LOTES_A_UNIDADES * -1
+        else:
+            ganancia = (precio_inicial - precios) * lotes_acumulados * LOTES_A_UNIDADES
+
+    # Reemplazar inf, -inf y NaN en caso de divisiones por cero o acumulación cero
+    aumento = np.nan_to_num(aumento, nan=0.0, posinf=0.0, neginf=0.0)
+    ganancia = np.nan_to_num(ganancia, nan=0.0, posinf=0.0, neginf=0.0)
+
+    return lotes_acumulados, break_even, flotante, puntos_salida, aumento, ganancia